@@ -30,6 +30,17 @@ func main() {
 	}
 	logger.Log.Info().Msg("Connected to database")
 
+	// Apply schema changes that an existing database volume predates
+	if err := db.Migrate(); err != nil {
+		logger.Log.Warn().Err(err).Msg("Schema migration failed, recording observations without geolocation")
+	}
+	// Indexes added after launch build in the background on existing databases
+	go func() {
+		if err := db.EnsureIndexes(); err != nil {
+			logger.Log.Warn().Err(err).Msg("Building post-launch indexes failed")
+		}
+	}()
+
 	// Seed Prometheus counters from historical DB totals
 	metrics.SeedFromDB(db.Conn())
 
@@ -14,6 +14,9 @@ import (
 
 type DB struct {
 	conn *sql.DB
+	// observationGeo is set once transaction_observations is known to have
+	// the first-peer geolocation columns (see Migrate)
+	observationGeo bool
 }
 
 type Config struct {
@@ -78,6 +81,68 @@ func NewFromConfig(cfg *Config) (*DB, error) {
 	return New(cfg.DBHost, cfg.DBPort, cfg.DBUser, cfg.DBPassword, cfg.DBName)
 }
 
+// Migrate brings an existing database up to date with schema.sql.
+// schema.sql only runs when the Postgres volume is first initialised, so
+// columns added since then are created here, idempotently, at startup.
+// Until Migrate succeeds, observations are recorded without geolocation.
+func (db *DB) Migrate() error {
+	_, err := db.conn.Exec(
+		`ALTER TABLE transaction_observations
+		     ADD COLUMN IF NOT EXISTS country_code VARCHAR(2),
+		     ADD COLUMN IF NOT EXISTS latitude     DECIMAL(9,6),
+		     ADD COLUMN IF NOT EXISTS longitude    DECIMAL(9,6)`,
+	)
+	if err != nil {
+		return fmt.Errorf("adding transaction_observations geolocation columns: %w", err)
+	}
+	db.observationGeo = true
+	return nil
+}
+
+// concurrentIndexes are schema.sql indexes added after launch, which
+// existing databases only get through EnsureIndexes.
+var concurrentIndexes = []struct{ name, definition string }{
+	{"idx_peer_geo_covering", `ON peer_connections(peer_addr)
+	     INCLUDE (country_code, region, latitude, longitude, city)`},
+	{"idx_tx_obs_first_peer_time", `ON transaction_observations(first_peer_addr, first_seen_at DESC)`},
+	{"idx_propagation_peer", `ON propagation_events(peer_addr)`},
+	{"idx_tx_obs_double_spend", `ON transaction_observations(tx_hash)
+	     WHERE double_spend_flag = TRUE`},
+}
+
+// EnsureIndexes builds any missing post-launch indexes. Each build runs
+// CONCURRENTLY, so it does not block observer writes, and as its own
+// statement because CREATE INDEX CONCURRENTLY cannot run in a transaction.
+// Builds can take a while on large tables, so callers run this in the
+// background. An interrupted build leaves an invalid index behind, which
+// is dropped and rebuilt.
+func (db *DB) EnsureIndexes() error {
+	for _, idx := range concurrentIndexes {
+		var valid bool
+		err := db.conn.QueryRow(
+			`SELECT i.indisvalid FROM pg_index i
+			 JOIN pg_class c ON c.oid = i.indexrelid
+			 WHERE c.relname = $1`,
+			idx.name,
+		).Scan(&valid)
+		switch {
+		case err == sql.ErrNoRows:
+		case err != nil:
+			return fmt.Errorf("checking index %s: %w", idx.name, err)
+		case valid:
+			continue
+		default:
+			if _, err := db.conn.Exec(`DROP INDEX CONCURRENTLY IF EXISTS ` + idx.name); err != nil {
+				return fmt.Errorf("dropping invalid index %s: %w", idx.name, err)
+			}
+		}
+		if _, err := db.conn.Exec(`CREATE INDEX CONCURRENTLY IF NOT EXISTS ` + idx.name + ` ` + idx.definition); err != nil {
+			return fmt.Errorf("creating index %s: %w", idx.name, err)
+		}
+	}
+	return nil
+}
+
 func (db *DB) Conn() *sql.DB {
 	return db.conn
 }
@@ -157,12 +222,19 @@ func (db *DB) UpdatePeerLatency(peerAddr string, latencyMs int) error {
 
 
 func (db *DB) RecordObservation(txHash []byte, peerAddr string) error {
-	_, err := db.conn.Exec(
-		`INSERT INTO transaction_observations (tx_hash, first_seen_at, first_peer_addr)
+	query := `INSERT INTO transaction_observations (tx_hash, first_seen_at, first_peer_addr)
 		 VALUES ($1, NOW(), $2)
-		 ON CONFLICT (tx_hash) DO UPDATE SET peer_count = transaction_observations.peer_count + 1`,
-		txHash, peerAddr,
-	)
+		 ON CONFLICT (tx_hash) DO UPDATE SET peer_count = transaction_observations.peer_count + 1`
+	if db.observationGeo {
+		// Copy the first peer's geolocation onto the observation so geographic
+		// activity queries don't need to join peer_connections.
+		query = `INSERT INTO transaction_observations (tx_hash, first_seen_at, first_peer_addr, country_code, latitude, longitude)
+		 SELECT $1, NOW(), $2::VARCHAR, pc.country_code, pc.latitude, pc.longitude
+		 FROM (SELECT 1) AS one
+		 LEFT JOIN peer_connections pc ON pc.peer_addr = $2::VARCHAR
+		 ON CONFLICT (tx_hash) DO UPDATE SET peer_count = transaction_observations.peer_count + 1`
+	}
+	_, err := db.conn.Exec(query, txHash, peerAddr)
 	if err != nil {
 		return err
 	}
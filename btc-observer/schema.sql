@@ -22,6 +22,12 @@ CREATE TABLE IF NOT EXISTS peer_connections (
 );
 
 CREATE INDEX IF NOT EXISTS idx_peer_region ON peer_connections(region);
+-- Covering index: joins from observations/propagation events read the
+-- geolocation columns with an index-only scan. CONCURRENTLY indexes in this
+-- file were added after launch; the observer also builds them on existing
+-- databases (database.EnsureIndexes)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_peer_geo_covering ON peer_connections(peer_addr)
+    INCLUDE (country_code, region, latitude, longitude, city);
 
 CREATE TABLE IF NOT EXISTS blocks (
     block_hash      BYTEA PRIMARY KEY,
@@ -47,10 +53,25 @@ CREATE TABLE IF NOT EXISTS transaction_observations (
     in_block_hash       BYTEA,
     confirmed_at        TIMESTAMP,
     replaced_by_tx      BYTEA,
-    double_spend_flag   BOOLEAN DEFAULT FALSE
+    double_spend_flag   BOOLEAN DEFAULT FALSE,
+    -- Geolocation of first_peer_addr, copied from peer_connections at insert
+    country_code        VARCHAR(2),
+    latitude            DECIMAL(9,6),
+    longitude           DECIMAL(9,6)
 );
 
+-- Existing databases: add the denormalized geolocation columns (the
+-- observer also applies this at startup, see database.Migrate)
+ALTER TABLE transaction_observations
+    ADD COLUMN IF NOT EXISTS country_code VARCHAR(2),
+    ADD COLUMN IF NOT EXISTS latitude     DECIMAL(9,6),
+    ADD COLUMN IF NOT EXISTS longitude    DECIMAL(9,6);
+
 CREATE INDEX IF NOT EXISTS idx_tx_obs_first_seen ON transaction_observations(first_seen_at);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tx_obs_first_peer_time
+    ON transaction_observations(first_peer_addr, first_seen_at DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tx_obs_double_spend ON transaction_observations(tx_hash)
+    WHERE double_spend_flag = TRUE;
 CREATE INDEX IF NOT EXISTS idx_tx_obs_unconfirmed ON transaction_observations(in_block_hash)
     WHERE in_block_hash IS NULL;
 
@@ -107,3 +128,8 @@ CREATE TABLE IF NOT EXISTS propagation_events (
 );
 
 CREATE INDEX IF NOT EXISTS idx_propagation_tx ON propagation_events(tx_hash);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_propagation_peer ON propagation_events(peer_addr);
+
+-- The tx_edges materialized view (pre-aggregated graph input) is created and
+-- refreshed by graph-analytics at startup; its definition lives in
+-- graph_analytics.TX_EDGES_DDL.
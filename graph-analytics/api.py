@@ -5,11 +5,11 @@ Internal API — served behind Caddy, not exposed to external clients directly.
 """
 
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
 from datetime import datetime
 
-from graph_analytics import TransactionGraph, RiskAnalyzer, RiskScore, get_db_connection
+from graph_analytics import TransactionGraph, RiskAnalyzer, RiskScore, db_connection, ensure_tx_edges
 
 app = FastAPI(
     title="Bitcoin Graph Analytics API",
@@ -41,7 +41,7 @@ class RiskScoreResponse(BaseModel):
 class PathRequest(BaseModel):
     source: str
     target: str
-    max_hops: int = 5
+    max_hops: int = Field(5, ge=0)
 
 
 class PathResponse(BaseModel):
@@ -51,8 +51,70 @@ class PathResponse(BaseModel):
     hops: Optional[int]
 
 
+class PageRankEntry(BaseModel):
+    address: str
+    pagerank: float
+
+
+class PageRankResponse(BaseModel):
+    top_addresses: List[PageRankEntry]
+
+
+class CommunitySummary(BaseModel):
+    id: int
+    size: int
+    addresses: List[str]
+
+
+class CommunitiesResponse(BaseModel):
+    total_communities: int
+    communities: List[CommunitySummary]
+
+
+class HighRiskAddress(BaseModel):
+    address: str
+    risk_score: float
+    pagerank: float
+    factors: Dict[str, float]
+    explanation: str
+
+
+class HighRiskAddressesResponse(BaseModel):
+    high_risk_addresses: List[HighRiskAddress]
+
+
+class GeoActivityLocation(BaseModel):
+    country_code: str
+    lat: float
+    lng: float
+    tx_count: int
+
+
+class GeoActivityResponse(BaseModel):
+    locations: List[GeoActivityLocation]
+    error: Optional[str] = None
+
+
+class PeerLocation(BaseModel):
+    country_code: Optional[str] = None
+    lat: float
+    lng: float
+    city: Optional[str] = None
+    peer_count: int
+    active: bool
+
+
+class PeerLocationsResponse(BaseModel):
+    peers: List[PeerLocation]
+    error: Optional[str] = None
+
+
 import asyncio
+import heapq
 import logging
+import time
+
+import numpy as np
 
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger("api")
@@ -60,118 +122,220 @@ log = logging.getLogger("api")
 last_graph_update = None
 analytics_cache = {}
 
+# (inputs, outputs) of every complete transaction in the current graph
+# window, keyed by tx hash, so each rebuild only fetches transactions that are
+# new to tx_edges or were still missing inputs or outputs
+_tx_window = {}
 
-def rebuild_graph():
-    """Rebuild the transaction graph from database"""
-    global transaction_graph, risk_analyzer, last_graph_update
+
+def rebuild_graph(raise_errors=False):
+    """
+    Rebuild the transaction graph from database.
+
+    Failures are logged and the current graph is kept; with raise_errors the
+    exception is re-raised so callers (startup retries) can react to it.
+    """
+    global transaction_graph, risk_analyzer, analytics_cache, last_graph_update, _tx_window
 
     log.info("Rebuilding transaction graph...")
 
     try:
+        ensure_tx_edges()
+
         # Create fresh graph
         new_graph = TransactionGraph()
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        with db_connection() as conn:
+            # tx_edges holds one row per recent transaction with its input and
+            # output (address, value) pairs pre-aggregated (see graph_analytics.TX_EDGES_QUERY).
+            # Read just the window's hashes and timestamps first...
+            cursor = conn.cursor()
+            cursor.execute("""
+            SELECT tx_hash, first_seen_at
+            FROM tx_edges
+            ORDER BY first_seen_at DESC
+            LIMIT 10000
+            """)
+            window_rows = [(row['tx_hash'].hex(), row['first_seen_at']) for row in cursor]
+            cursor.close()
+
+            # ...then fetch inputs/outputs only for transactions that were not
+            # in the previous window. Named (server-side) cursor: rows are
+            # streamed in itersize batches rather than materialized up front.
+            new_hashes = [
+                bytes.fromhex(tx_hash) for tx_hash, _ in window_rows
+                if tx_hash not in _tx_window
+            ]
+            fetched = {}
+            if new_hashes:
+                cursor = conn.cursor(name='rebuild_stream')
+                cursor.itersize = 2000
+                cursor.execute("""
+                SELECT tx_hash, inputs, outputs
+                FROM tx_edges
+                WHERE tx_hash = ANY(%s)
+                """, (new_hashes,))
+                # bytea arrives as a memoryview (hex() without a copy) and the
+                # jsonb pairs are already [address, int] lists
+                for row in cursor:
+                    fetched[row['tx_hash'].hex()] = (row['inputs'], row['outputs'])
+                cursor.close()
+
+        # Transactions that dropped out of tx_edges are evicted simply by not
+        # being carried over. Incomplete ones (e.g. a child seen before its
+        # parent's outputs were recorded) are not carried over either, so the
+        # next rebuild fetches them again.
+        new_window = {}
+        transactions = []
+        for tx_hash, first_seen_at in window_rows:
+            inputs, outputs = _tx_window.get(tx_hash) or fetched.get(tx_hash, (None, None))
+            if inputs and outputs:
+                new_window[tx_hash] = (inputs, outputs)
+                transactions.append((tx_hash, inputs, outputs, first_seen_at))
+        new_graph.add_transactions_bulk(transactions)
+        log.info(f"Fetched {len(fetched)} new of {len(window_rows)} transactions")
+
+        log.info(f"Graph rebuilt: {new_graph.graph.number_of_nodes()} nodes, {new_graph.graph.number_of_edges()} edges")
+
+        new_graph.precompute_metrics()
+        new_analyzer = RiskAnalyzer(new_graph)
+        new_cache = refresh_analytics_cache(new_graph, new_analyzer)
+
+        # Swap in the new graph together with the analytics computed on it
+        transaction_graph = new_graph
+        risk_analyzer = new_analyzer
+        analytics_cache = new_cache
+        _tx_window = new_window
+        last_graph_update = datetime.now()
 
-        query = """
-        SELECT
-            t.tx_hash,
-            to_in.address AS input_address,
-            to_in.value_satoshis AS input_value,
-            to_out.address AS output_address,
-            to_out.value_satoshis AS output_value,
-            obs.first_seen_at
-        FROM transactions t
-        JOIN transaction_inputs ti ON t.tx_hash = ti.tx_hash
-        JOIN transaction_outputs to_in
-            ON ti.prev_tx_hash = to_in.tx_hash
-           AND ti.prev_output_idx = to_in.output_index
-        JOIN transaction_outputs to_out ON t.tx_hash = to_out.tx_hash
-        LEFT JOIN transaction_observations obs ON t.tx_hash = obs.tx_hash
-        WHERE to_in.address IS NOT NULL
-          AND to_out.address IS NOT NULL
-        ORDER BY obs.first_seen_at DESC
-        LIMIT 10000
-        """
-
-        cursor.execute(query)
-        rows = cursor.fetchall()
+        # Refresh the view once the new graph is published, so requests are
+        # already served from it while the next cycle's snapshot is built.
+        # This still runs on the rebuild thread.
+        refresh_tx_edges()
 
-        tx_data = {}
-        for row in rows:
-            tx_hash = bytes(row['tx_hash']).hex()
-            if tx_hash not in tx_data:
-                tx_data[tx_hash] = {
-                    'inputs': set(),
-                    'outputs': set(),
-                    'timestamp': row['first_seen_at']
-                }
+    except Exception as e:
+        log.error(f"Failed to rebuild graph: {e}")
+        if raise_errors:
+            raise
 
-            if row['input_address']:
-                tx_data[tx_hash]['inputs'].add((
-                    row['input_address'],
-                    int(row['input_value'])
-                ))
-
-            if row['output_address']:
-                tx_data[tx_hash]['outputs'].add((
-                    row['output_address'],
-                    int(row['output_value'])
-                ))
-
-        for tx_hash, data in tx_data.items():
-            if data['inputs'] and data['outputs']:
-                new_graph.add_transaction(
-                    tx_hash,
-                    list(data['inputs']),
-                    list(data['outputs']),
-                    data['timestamp']
-                )
 
-        cursor.close()
-        conn.close()
+def refresh_tx_edges():
+    """Refresh the tx_edges materialized view read by rebuild_graph."""
+    try:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY tx_edges")
+            conn.commit()
+            cursor.close()
+    except Exception as e:
+        log.warning(f"Failed to refresh tx_edges: {e}")
 
-        # Swap in the new graph
-        transaction_graph = new_graph
-        risk_analyzer = RiskAnalyzer(transaction_graph)
-        last_graph_update = datetime.now()
 
-        log.info(f"Graph rebuilt: {transaction_graph.graph.number_of_nodes()} nodes, {transaction_graph.graph.number_of_edges()} edges")
+def score_high_risk_addresses(tx_graph, analyzer):
+    """Score a candidate pool of likely-risky addresses, highest risk first."""
+    pagerank = tx_graph.calculate_pagerank()
 
-        refresh_analytics_cache()
+    # Build a broad candidate pool from multiple signals
+    candidates = set()
 
-    except Exception as e:
-        log.error(f"Failed to rebuild graph: {e}")
+    # 1. Top PageRank addresses (high centrality)
+    sorted_by_pr = heapq.nlargest(50, pagerank.items(), key=lambda x: x[1])
+    candidates.update(addr for addr, _ in sorted_by_pr)
 
+    # 2. Addresses involved in double-spend attempts
+    try:
+        with db_connection() as conn:
+            cur = conn.cursor()
+            # One pass over flagged observations; each pulls both its
+            # output addresses and the addresses of the outputs it spends
+            cur.execute("""
+                WITH ds AS (
+                    SELECT tx_hash FROM transaction_observations
+                    WHERE double_spend_flag = TRUE
+                )
+                SELECT DISTINCT sub.address
+                FROM ds, LATERAL (
+                    SELECT tout.address
+                    FROM transaction_outputs tout
+                    WHERE tout.tx_hash = ds.tx_hash AND tout.address IS NOT NULL
+                    UNION
+                    SELECT prev_out.address
+                    FROM transaction_inputs tin
+                    JOIN transaction_outputs prev_out
+                        ON tin.prev_tx_hash = prev_out.tx_hash
+                        AND tin.prev_output_idx = prev_out.output_index
+                    WHERE tin.tx_hash = ds.tx_hash AND prev_out.address IS NOT NULL
+                ) sub
+            """)
+            candidates.update(row["address"] for row in cur.fetchall())
+            cur.close()
+    except Exception:
+        pass
 
-def refresh_analytics_cache():
-    """Pre-compute all analytics results so endpoints serve instantly."""
+    # 3. Addresses with high in+out degree (potential mixers)
+    in_degree, out_degree, _, _ = tx_graph.address_totals()
+    mixers = np.flatnonzero((in_degree > 50) & (out_degree > 50))
+    nodelist = tx_graph.nodelist
+    candidates.update(nodelist[node_id] for node_id in mixers.tolist())
+
+    # Scored together: one batched double-spend lookup for the whole pool,
+    # then array operations over the graph's CSR
+    candidates = list(candidates)
+    risks = [
+        {
+            "address": risk.address,
+            "risk_score": risk.score,
+            "pagerank": pagerank.get(risk.address, 0),
+            "factors": risk.risk_factors,
+            "explanation": risk.explanation
+        }
+        for risk in analyzer.calculate_risk_scores(candidates, pagerank)
+    ]
+
+    # Sort by risk score
+    risks.sort(key=lambda x: x["risk_score"], reverse=True)
+    return risks
+
+
+def compute_graph_stats(tx_graph):
+    """Overall graph statistics (node/edge counts, density, average degree)."""
     import networkx as nx
 
+    graph = tx_graph.graph
+    stats = {
+        "nodes": graph.number_of_nodes(),
+        "edges": graph.number_of_edges(),
+        "density": nx.density(graph) if graph.number_of_nodes() > 0 else 0,
+    }
+    if graph.number_of_nodes() > 0:
+        try:
+            stats["avg_degree"] = sum(dict(graph.degree()).values()) / graph.number_of_nodes()
+        except:
+            pass
+    return stats
+
+
+def refresh_analytics_cache(tx_graph, analyzer):
+    """
+    Pre-compute all analytics results so endpoints serve instantly.
+
+    Returns a fresh cache dict for `tx_graph`; rebuild_graph publishes it
+    together with the graph so cached results never outlive their graph.
+    """
+    cache = {}
+
     # Stats
     try:
-        graph = transaction_graph.graph
-        stats = {
-            "nodes": graph.number_of_nodes(),
-            "edges": graph.number_of_edges(),
-            "density": nx.density(graph) if graph.number_of_nodes() > 0 else 0,
-        }
-        if graph.number_of_nodes() > 0:
-            try:
-                stats["avg_degree"] = sum(dict(graph.degree()).values()) / graph.number_of_nodes()
-            except:
-                pass
-        analytics_cache["stats"] = stats
+        cache["stats"] = compute_graph_stats(tx_graph)
     except Exception as e:
         log.warning(f"Cache stats failed: {e}")
 
     # PageRank (cache full sorted list; also used by high-risk below)
     pagerank = {}
     try:
-        pagerank = transaction_graph.calculate_pagerank()
+        pagerank = tx_graph.calculate_pagerank()
         sorted_ranks = sorted(pagerank.items(), key=lambda x: x[1], reverse=True)
-        analytics_cache["pagerank"] = [
+        cache["pagerank"] = [
             {"address": addr, "pagerank": score} for addr, score in sorted_ranks
         ]
     except Exception as e:
@@ -179,8 +343,8 @@ def refresh_analytics_cache():
 
     # Communities
     try:
-        communities = transaction_graph.find_communities()
-        analytics_cache["communities"] = {
+        communities = tx_graph.find_communities()
+        cache["communities"] = {
             "total_communities": len(communities),
             "communities": [
                 {"id": i, "size": len(c), "addresses": list(c)[:10]}
@@ -192,130 +356,25 @@ def refresh_analytics_cache():
 
     # High-risk addresses
     try:
-        if risk_analyzer and pagerank:
-            candidates = set()
-            sorted_by_pr = sorted(pagerank.items(), key=lambda x: x[1], reverse=True)[:50]
-            candidates.update(addr for addr, _ in sorted_by_pr)
-
-            try:
-                conn = get_db_connection()
-                cur = conn.cursor()
-                cur.execute("""
-                    SELECT DISTINCT address FROM (
-                        SELECT tout.address
-                        FROM transaction_observations obs
-                        JOIN transaction_outputs tout ON obs.tx_hash = tout.tx_hash
-                        WHERE obs.double_spend_flag = TRUE AND tout.address IS NOT NULL
-                        UNION
-                        SELECT prev_out.address
-                        FROM transaction_observations obs
-                        JOIN transaction_inputs tin ON obs.tx_hash = tin.tx_hash
-                        JOIN transaction_outputs prev_out
-                            ON tin.prev_tx_hash = prev_out.tx_hash
-                            AND tin.prev_output_idx = prev_out.output_index
-                        WHERE obs.double_spend_flag = TRUE AND prev_out.address IS NOT NULL
-                    ) ds_addrs
-                """)
-                candidates.update(row["address"] for row in cur.fetchall())
-                cur.close()
-                conn.close()
-            except Exception:
-                pass
-
-            for node in transaction_graph.graph.nodes():
-                in_deg = transaction_graph.graph.in_degree(node)
-                out_deg = transaction_graph.graph.out_degree(node)
-                if in_deg > 50 and out_deg > 50:
-                    candidates.add(node)
-
-            risks = []
-            for addr in candidates:
-                try:
-                    risk = risk_analyzer.calculate_risk_score(addr, pagerank=pagerank)
-                    risks.append({
-                        "address": addr,
-                        "risk_score": risk.score,
-                        "pagerank": pagerank.get(addr, 0),
-                        "factors": risk.risk_factors,
-                        "explanation": risk.explanation,
-                    })
-                except:
-                    pass
-            risks.sort(key=lambda x: x["risk_score"], reverse=True)
-            analytics_cache["high_risk"] = risks
+        if analyzer and pagerank:
+            cache["high_risk"] = score_high_risk_addresses(tx_graph, analyzer)
     except Exception as e:
         log.warning(f"Cache high-risk failed: {e}")
 
     # Country rankings
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT
-                pc.country_code,
-                pc.region,
-                COUNT(DISTINCT obs.tx_hash) as first_seen_count,
-                COUNT(DISTINCT pc.peer_addr) as peer_count
-            FROM peer_connections pc
-            JOIN transaction_observations obs ON pc.peer_addr = obs.first_peer_addr
-            WHERE pc.country_code IS NOT NULL
-            GROUP BY pc.country_code, pc.region
-            ORDER BY first_seen_count DESC
-            LIMIT 20
-        """)
-        rows = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        analytics_cache["country_rankings"] = {
-            "rankings": [
-                {
-                    "country_code": row["country_code"],
-                    "region": row["region"],
-                    "first_seen_count": row["first_seen_count"],
-                    "peer_count": row["peer_count"],
-                }
-                for row in rows
-            ]
-        }
+        cache["country_rankings"] = fetch_country_rankings()
     except Exception as e:
         log.warning(f"Cache country-rankings failed: {e}")
 
     # Propagation stats
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT
-                pc.region,
-                COUNT(*) as observation_count,
-                AVG(pe.delay_from_first_ms) as avg_delay_ms,
-                MIN(pe.delay_from_first_ms) as min_delay_ms,
-                MAX(pe.delay_from_first_ms) as max_delay_ms
-            FROM propagation_events pe
-            JOIN peer_connections pc ON pe.peer_addr = pc.peer_addr
-            WHERE pc.region IS NOT NULL
-            GROUP BY pc.region
-            ORDER BY observation_count DESC
-        """)
-        rows = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        analytics_cache["propagation_stats"] = {
-            "by_region": [
-                {
-                    "region": row["region"],
-                    "observation_count": row["observation_count"],
-                    "avg_delay_ms": float(row["avg_delay_ms"]) if row["avg_delay_ms"] else 0,
-                    "min_delay_ms": row["min_delay_ms"],
-                    "max_delay_ms": row["max_delay_ms"],
-                }
-                for row in rows
-            ]
-        }
+        cache["propagation_stats"] = fetch_propagation_stats()
     except Exception as e:
         log.warning(f"Cache propagation-stats failed: {e}")
 
     log.info("Analytics cache refreshed")
+    return cache
 
 
 async def graph_rebuild_task():
@@ -330,7 +389,9 @@ async def startup_rebuild():
     max_retries = 10
     for attempt in range(1, max_retries + 1):
         try:
-            await asyncio.to_thread(rebuild_graph)
+            await asyncio.to_thread(ensure_tx_edges)
+            await asyncio.to_thread(refresh_tx_edges)
+            await asyncio.to_thread(rebuild_graph, raise_errors=True)
             break
         except Exception as e:
             if attempt == max_retries:
@@ -369,7 +430,7 @@ async def root():
 @app.get("/address/{address}/metrics", response_model=AddressMetricsResponse)
 async def get_address_metrics(address: str):
     """Get network metrics for a specific address"""
-    metrics = transaction_graph.get_address_metrics(address)
+    metrics = await asyncio.to_thread(transaction_graph.get_address_metrics, address)
     
     if "error" in metrics:
         raise HTTPException(status_code=404, detail=metrics["error"])
@@ -383,7 +444,7 @@ async def get_risk_score(address: str):
     if not risk_analyzer:
         raise HTTPException(status_code=503, detail="Risk analyzer not initialized")
     
-    risk = risk_analyzer.calculate_risk_score(address)
+    risk = await asyncio.to_thread(risk_analyzer.calculate_risk_score, address)
     
     return {
         "address": risk.address,
@@ -396,9 +457,10 @@ async def get_risk_score(address: str):
 @app.post("/path", response_model=PathResponse)
 async def find_path(request: PathRequest):
     """Find shortest path between two addresses"""
-    path = transaction_graph.trace_funds(
-        request.source, 
-        request.target, 
+    path = await asyncio.to_thread(
+        transaction_graph.trace_funds,
+        request.source,
+        request.target,
         request.max_hops
     )
     
@@ -410,14 +472,14 @@ async def find_path(request: PathRequest):
     }
 
 
-@app.get("/pagerank")
+@app.get("/pagerank", response_model=PageRankResponse)
 async def get_pagerank(top_n: int = 10):
     """Get top addresses by PageRank"""
     if "pagerank" in analytics_cache:
         return {"top_addresses": analytics_cache["pagerank"][:top_n]}
 
-    pagerank = transaction_graph.calculate_pagerank()
-    sorted_ranks = sorted(pagerank.items(), key=lambda x: x[1], reverse=True)[:top_n]
+    pagerank = await asyncio.to_thread(transaction_graph.calculate_pagerank)
+    sorted_ranks = heapq.nlargest(top_n, pagerank.items(), key=lambda x: x[1])
     return {
         "top_addresses": [
             {"address": addr, "pagerank": score}
@@ -426,13 +488,13 @@ async def get_pagerank(top_n: int = 10):
     }
 
 
-@app.get("/communities")
+@app.get("/communities", response_model=CommunitiesResponse)
 async def get_communities():
     """Identify transaction communities"""
     if "communities" in analytics_cache:
         return analytics_cache["communities"]
 
-    communities = transaction_graph.find_communities()
+    communities = await asyncio.to_thread(transaction_graph.find_communities)
     return {
         "total_communities": len(communities),
         "communities": [
@@ -452,29 +514,12 @@ async def get_stats():
     if "stats" in analytics_cache:
         return analytics_cache["stats"]
 
-    import networkx as nx
-    graph = transaction_graph.graph
-    stats = {
-        "nodes": graph.number_of_nodes(),
-        "edges": graph.number_of_edges(),
-        "density": nx.density(graph) if graph.number_of_nodes() > 0 else 0,
-    }
-    if graph.number_of_nodes() > 0:
-        try:
-            stats["avg_degree"] = sum(dict(graph.degree()).values()) / graph.number_of_nodes()
-        except:
-            pass
-    return stats
+    return await asyncio.to_thread(compute_graph_stats, transaction_graph)
 
 
-@app.get("/country-rankings")
-async def get_country_rankings():
-    """Get countries ranked by first-seen transaction observations"""
-    if "country_rankings" in analytics_cache:
-        return analytics_cache["country_rankings"]
-
-    try:
-        conn = get_db_connection()
+def fetch_country_rankings():
+    """Countries ranked by first-seen transaction observations."""
+    with db_connection() as conn:
         cursor = conn.cursor()
 
         cursor.execute("""
@@ -493,24 +538,33 @@ async def get_country_rankings():
 
         rows = cursor.fetchall()
         cursor.close()
-        conn.close()
-
-        return {
-            "rankings": [
-                {
-                    "country_code": row["country_code"],
-                    "region": row["region"],
-                    "first_seen_count": row["first_seen_count"],
-                    "peer_count": row["peer_count"]
-                }
-                for row in rows
-            ]
-        }
+
+    return {
+        "rankings": [
+            {
+                "country_code": row["country_code"],
+                "region": row["region"],
+                "first_seen_count": row["first_seen_count"],
+                "peer_count": row["peer_count"]
+            }
+            for row in rows
+        ]
+    }
+
+
+@app.get("/country-rankings")
+async def get_country_rankings():
+    """Get countries ranked by first-seen transaction observations"""
+    if "country_rankings" in analytics_cache:
+        return analytics_cache["country_rankings"]
+
+    try:
+        return await asyncio.to_thread(fetch_country_rankings)
     except Exception as e:
         return {"rankings": [], "error": str(e)}
 
 
-@app.get("/high-risk-addresses")
+@app.get("/high-risk-addresses", response_model=HighRiskAddressesResponse)
 async def get_high_risk_addresses(top_n: int = 10):
     """Get addresses with highest risk scores"""
     if "high_risk" in analytics_cache:
@@ -519,75 +573,13 @@ async def get_high_risk_addresses(top_n: int = 10):
     if not risk_analyzer:
         raise HTTPException(status_code=503, detail="Risk analyzer not initialized")
 
-    pagerank = transaction_graph.calculate_pagerank()
-
-    # Build a broad candidate pool from multiple signals
-    candidates = set()
-
-    # 1. Top PageRank addresses (high centrality)
-    sorted_by_pr = sorted(pagerank.items(), key=lambda x: x[1], reverse=True)[:50]
-    candidates.update(addr for addr, _ in sorted_by_pr)
-
-    # 2. Addresses involved in double-spend attempts
-    try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT DISTINCT address FROM (
-                SELECT tout.address
-                FROM transaction_observations obs
-                JOIN transaction_outputs tout ON obs.tx_hash = tout.tx_hash
-                WHERE obs.double_spend_flag = TRUE AND tout.address IS NOT NULL
-                UNION
-                SELECT prev_out.address
-                FROM transaction_observations obs
-                JOIN transaction_inputs tin ON obs.tx_hash = tin.tx_hash
-                JOIN transaction_outputs prev_out
-                    ON tin.prev_tx_hash = prev_out.tx_hash
-                    AND tin.prev_output_idx = prev_out.output_index
-                WHERE obs.double_spend_flag = TRUE AND prev_out.address IS NOT NULL
-            ) ds_addrs
-        """)
-        candidates.update(row["address"] for row in cur.fetchall())
-        cur.close()
-        conn.close()
-    except Exception:
-        pass
-
-    # 3. Addresses with high in+out degree (potential mixers)
-    for node in transaction_graph.graph.nodes():
-        in_deg = transaction_graph.graph.in_degree(node)
-        out_deg = transaction_graph.graph.out_degree(node)
-        if in_deg > 50 and out_deg > 50:
-            candidates.add(node)
-
-    risks = []
-    for addr in candidates:
-        try:
-            risk = risk_analyzer.calculate_risk_score(addr, pagerank=pagerank)
-            risks.append({
-                "address": addr,
-                "risk_score": risk.score,
-                "pagerank": pagerank.get(addr, 0),
-                "factors": risk.risk_factors,
-                "explanation": risk.explanation
-            })
-        except:
-            pass
-
-    # Sort by risk score and return top N
-    risks.sort(key=lambda x: x["risk_score"], reverse=True)
+    risks = await asyncio.to_thread(score_high_risk_addresses, transaction_graph, risk_analyzer)
     return {"high_risk_addresses": risks[:top_n]}
 
 
-@app.get("/propagation-stats")
-async def get_propagation_stats():
-    """Get transaction propagation statistics by region"""
-    if "propagation_stats" in analytics_cache:
-        return analytics_cache["propagation_stats"]
-
-    try:
-        conn = get_db_connection()
+def fetch_propagation_stats():
+    """Transaction propagation delay statistics by peer region."""
+    with db_connection() as conn:
         cursor = conn.cursor()
 
         cursor.execute("""
@@ -606,72 +598,84 @@ async def get_propagation_stats():
 
         rows = cursor.fetchall()
         cursor.close()
-        conn.close()
-
-        return {
-            "by_region": [
-                {
-                    "region": row["region"],
-                    "observation_count": row["observation_count"],
-                    "avg_delay_ms": float(row["avg_delay_ms"]) if row["avg_delay_ms"] else 0,
-                    "min_delay_ms": row["min_delay_ms"],
-                    "max_delay_ms": row["max_delay_ms"]
-                }
-                for row in rows
-            ]
-        }
+
+    return {
+        "by_region": [
+            {
+                "region": row["region"],
+                "observation_count": row["observation_count"],
+                "avg_delay_ms": float(row["avg_delay_ms"]) if row["avg_delay_ms"] else 0,
+                "min_delay_ms": row["min_delay_ms"],
+                "max_delay_ms": row["max_delay_ms"]
+            }
+            for row in rows
+        ]
+    }
+
+
+@app.get("/propagation-stats")
+async def get_propagation_stats():
+    """Get transaction propagation statistics by region"""
+    if "propagation_stats" in analytics_cache:
+        return analytics_cache["propagation_stats"]
+
+    try:
+        return await asyncio.to_thread(fetch_propagation_stats)
     except Exception as e:
         return {"by_region": [], "error": str(e)}
 
 
-@app.get("/geo-activity")
-async def get_geo_activity():
-    """Get recent transaction activity by geographic location for world map"""
-    try:
-        conn = get_db_connection()
+def fetch_geo_activity():
+    """Transaction counts by first-peer location over the last hour."""
+    with db_connection() as conn:
         cursor = conn.cursor()
 
-        # Get transaction counts by country in the last hour
+        # Get transaction counts by country in the last hour. The first
+        # peer's location is stored on the observation itself, so this is
+        # a single range scan on first_seen_at (one row per tx_hash).
         cursor.execute("""
             SELECT
-                pc.country_code,
-                pc.latitude,
-                pc.longitude,
-                COUNT(DISTINCT obs.tx_hash) as tx_count
+                obs.country_code,
+                obs.latitude,
+                obs.longitude,
+                COUNT(*) as tx_count
             FROM transaction_observations obs
-            JOIN peer_connections pc ON obs.first_peer_addr = pc.peer_addr
-            WHERE pc.country_code IS NOT NULL
-              AND pc.latitude IS NOT NULL
-              AND pc.longitude IS NOT NULL
-              AND obs.first_seen_at > NOW() - INTERVAL '1 hour'
-            GROUP BY pc.country_code, pc.latitude, pc.longitude
+            WHERE obs.first_seen_at > NOW() - INTERVAL '1 hour'
+              AND obs.country_code IS NOT NULL
+              AND obs.latitude IS NOT NULL
+              AND obs.longitude IS NOT NULL
+            GROUP BY obs.country_code, obs.latitude, obs.longitude
             ORDER BY tx_count DESC
         """)
 
         rows = cursor.fetchall()
         cursor.close()
-        conn.close()
-
-        return {
-            "locations": [
-                {
-                    "country_code": row["country_code"],
-                    "lat": float(row["latitude"]),
-                    "lng": float(row["longitude"]),
-                    "tx_count": row["tx_count"]
-                }
-                for row in rows
-            ]
-        }
+
+    return {
+        "locations": [
+            {
+                "country_code": row["country_code"],
+                "lat": float(row["latitude"]),
+                "lng": float(row["longitude"]),
+                "tx_count": row["tx_count"]
+            }
+            for row in rows
+        ]
+    }
+
+
+@app.get("/geo-activity", response_model=GeoActivityResponse, response_model_exclude_unset=True)
+async def get_geo_activity():
+    """Get recent transaction activity by geographic location for world map"""
+    try:
+        return await asyncio.to_thread(fetch_geo_activity)
     except Exception as e:
         return {"locations": [], "error": str(e)}
 
 
-@app.get("/peer-locations")
-async def get_peer_locations():
-    """Get geographic locations of all peers for network visualization"""
-    try:
-        conn = get_db_connection()
+def fetch_peer_locations():
+    """Peer counts per geographic location."""
+    with db_connection() as conn:
         cursor = conn.cursor()
 
         # Get unique peer locations (group by location to avoid duplicates)
@@ -691,28 +695,37 @@ async def get_peer_locations():
 
         rows = cursor.fetchall()
         cursor.close()
-        conn.close()
-
-        return {
-            "peers": [
-                {
-                    "country_code": row["country_code"],
-                    "lat": float(row["latitude"]),
-                    "lng": float(row["longitude"]),
-                    "city": row["city"],
-                    "peer_count": row["peer_count"],
-                    "active": row["active_count"] > 0
-                }
-                for row in rows
-            ]
-        }
+
+    return {
+        "peers": [
+            {
+                "country_code": row["country_code"],
+                "lat": float(row["latitude"]),
+                "lng": float(row["longitude"]),
+                "city": row["city"],
+                "peer_count": row["peer_count"],
+                "active": row["active_count"] > 0
+            }
+            for row in rows
+        ]
+    }
+
+
+@app.get("/peer-locations", response_model=PeerLocationsResponse, response_model_exclude_unset=True)
+async def get_peer_locations():
+    """Get geographic locations of all peers for network visualization"""
+    try:
+        return await asyncio.to_thread(fetch_peer_locations)
     except Exception as e:
         return {"peers": [], "error": str(e)}
 
 
-@app.get("/observer-location")
-async def get_observer_location():
-    """Get the observer's location based on public IP address"""
+OBSERVER_LOCATION_TTL = 3600  # seconds; the observer's public IP rarely changes
+_observer_location_cache = {"ts": 0.0, "value": None}
+
+
+def lookup_observer_location():
+    """Look up the observer's location from its public IP, or None on failure."""
     import urllib.request
     import json
 
@@ -730,8 +743,24 @@ async def get_observer_location():
                 }
     except Exception as e:
         pass
+    return None
+
 
-    # Fallback to a default location if lookup fails
+@app.get("/observer-location")
+async def get_observer_location():
+    """Get the observer's location based on public IP address"""
+    cached = _observer_location_cache["value"]
+    if cached and time.time() - _observer_location_cache["ts"] < OBSERVER_LOCATION_TTL:
+        return cached
+
+    location = await asyncio.to_thread(lookup_observer_location)
+    if location:
+        _observer_location_cache["ts"] = time.time()
+        _observer_location_cache["value"] = location
+        return location
+
+    # Fallback to a default location if lookup fails (not cached, so the
+    # next request retries)
     return {"lat": 51.5074, "lng": -0.1278, "city": "Unknown", "country": "Unknown", "ip": "Unknown"}
 
 
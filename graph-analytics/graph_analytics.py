@@ -4,17 +4,56 @@ Bitcoin Transaction Graph Analytics
 Analyzes transaction networks to identify risk patterns and trace fund flows.
 """
 
+import heapq
 import json
+import multiprocessing
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 
 import networkx as nx
+import numpy as np
 import psycopg2
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components, dijkstra
 from psycopg2.extras import RealDictCursor
-from typing import Dict, List, Tuple, Optional
+from psycopg2.pool import ThreadedConnectionPool
+from typing import Dict, Iterable, List, Tuple, Optional
 from dataclasses import dataclass
 from datetime import datetime
 import logging
 
+# Optional native community detection backends, in order of preference
+try:
+    from graspologic.partition import leiden as graspologic_leiden
+except ImportError:
+    graspologic_leiden = None
+
+try:
+    import community as community_louvain  # python-louvain
+except ImportError:
+    community_louvain = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+# Optional GPU backends for PageRank
+try:
+    import cudf
+    import cugraph
+except ImportError:
+    cugraph = None
+
+try:
+    import cupy
+    import cupyx.scipy.sparse as cupy_sparse
+except ImportError:
+    cupy = None
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -53,6 +92,121 @@ def get_db_connection(cfg=None):
     )
 
 
+_pool = None
+_pool_lock = threading.Lock()
+# ThreadedConnectionPool.getconn raises PoolError once maxconn connections are
+# out instead of waiting; db_connection takes a slot first so callers block
+_pool_slots = None
+
+
+def get_connection_pool(cfg=None, minconn=1, maxconn=16) -> ThreadedConnectionPool:
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is None:
+            if cfg is None:
+                cfg = load_config()
+            _pool_slots = threading.BoundedSemaphore(maxconn)
+            _pool = ThreadedConnectionPool(
+                minconn,
+                maxconn,
+                host=cfg["db_host"],
+                port=cfg["db_port"],
+                user=cfg["db_user"],
+                password=cfg["db_password"],
+                database=cfg["db_name"],
+                cursor_factory=RealDictCursor,
+                # Pooled connections sit idle between rebuilds; keepalives
+                # stop NAT/firewall timeouts from silently dropping them
+                keepalives=1,
+                keepalives_idle=30,
+                keepalives_interval=10,
+                keepalives_count=3,
+            )
+    return _pool
+
+
+@contextmanager
+def db_connection():
+    """
+    Borrow a connection from the pool for the duration of a `with` block.
+
+    Waits for a free connection when all of them are in use. Any
+    transaction left open is rolled back before the connection goes back
+    to the pool; broken connections are discarded.
+    """
+    pool = get_connection_pool()
+    _pool_slots.acquire()
+    try:
+        conn = pool.getconn()
+        try:
+            yield conn
+        finally:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                pass
+            pool.putconn(conn, close=bool(conn.closed))
+    finally:
+        _pool_slots.release()
+
+
+# One row per transaction with its distinct input and output (address,
+# value) pairs aggregated by Postgres, so a tx with I inputs and O outputs
+# costs I+O values instead of an I*O join fanout. main() runs it directly;
+# the API reads its results from the tx_edges materialized view.
+TX_EDGES_QUERY = """
+SELECT
+    t.tx_hash,
+    obs.first_seen_at,
+    (
+        SELECT jsonb_agg(DISTINCT jsonb_build_array(to_in.address, to_in.value_satoshis))
+        FROM transaction_inputs ti
+        JOIN transaction_outputs to_in
+            ON ti.prev_tx_hash = to_in.tx_hash
+           AND ti.prev_output_idx = to_in.output_index
+        WHERE ti.tx_hash = t.tx_hash
+          AND to_in.address IS NOT NULL
+    ) AS inputs,
+    (
+        SELECT jsonb_agg(DISTINCT jsonb_build_array(to_out.address, to_out.value_satoshis))
+        FROM transaction_outputs to_out
+        WHERE to_out.tx_hash = t.tx_hash
+          AND to_out.address IS NOT NULL
+    ) AS outputs
+FROM transactions t
+LEFT JOIN transaction_observations obs ON t.tx_hash = obs.tx_hash
+ORDER BY obs.first_seen_at DESC, t.tx_hash
+LIMIT 10000
+"""
+
+# The unique index is what allows REFRESH MATERIALIZED VIEW CONCURRENTLY
+TX_EDGES_DDL = f"""
+CREATE MATERIALIZED VIEW IF NOT EXISTS tx_edges AS {TX_EDGES_QUERY};
+CREATE UNIQUE INDEX IF NOT EXISTS idx_tx_edges_tx_hash ON tx_edges(tx_hash);
+CREATE INDEX IF NOT EXISTS idx_tx_edges_first_seen ON tx_edges(first_seen_at DESC);
+"""
+
+_tx_edges_ready = False
+
+
+def ensure_tx_edges():
+    """
+    Create the tx_edges materialized view and its indexes if they are
+    missing. Errors propagate to the caller; after one success this is a
+    no-op.
+    """
+    global _tx_edges_ready
+    if _tx_edges_ready:
+        return
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(TX_EDGES_DDL)
+        conn.commit()
+        cursor.close()
+    _tx_edges_ready = True
+
+
 @dataclass
 class RiskScore:
     """Risk assessment for a Bitcoin address"""
@@ -62,6 +216,423 @@ class RiskScore:
     explanation: str
 
 
+def _pagerank_power_iteration(transition_t, is_dangling, alpha, max_iter, tol, xp=np):
+    """
+    PageRank power iteration over the transposed transition matrix.
+    `xp` is the array module (numpy, or cupy with a cupyx sparse matrix).
+    The rank vector takes the matrix's dtype, so a float32 matrix keeps
+    the whole iteration in float32.
+    """
+    n = transition_t.shape[0]
+    x = xp.full(n, 1.0 / n, dtype=transition_t.dtype)
+    teleport = (1.0 - alpha) / n
+    for _ in range(max_iter):
+        x_last = x
+        # Dangling nodes redistribute their rank uniformly
+        x = alpha * (transition_t @ x_last + x_last[is_dangling].sum() / n) + teleport
+        if float(xp.abs(x - x_last).sum()) < n * tol:
+            return x
+    raise nx.PowerIterationFailedConvergence(max_iter)
+
+
+def _pagerank_cugraph(csr, alpha, max_iter, tol) -> np.ndarray:
+    """PageRank of a weighted CSR adjacency matrix, computed by cuGraph."""
+    coo = csr.tocoo()
+    edges = cudf.DataFrame(
+        {"src": coo.row, "dst": coo.col, "weight": coo.data.astype(np.float32)}
+    )
+    graph = cugraph.Graph(directed=True)
+    graph.from_cudf_edgelist(edges, source="src", destination="dst", edge_attr="weight")
+    result = cugraph.pagerank(graph, alpha=alpha, max_iter=max_iter, tol=tol).to_pandas()
+    x = np.zeros(csr.shape[0])
+    x[result["vertex"].to_numpy()] = result["pagerank"].to_numpy()
+    return x
+
+
+# Bounds for the in-repo and networkx Louvain, which can otherwise keep
+# aggregating levels almost indefinitely on sparse transaction graphs
+LOUVAIN_MAX_LEVEL = 10
+LOUVAIN_THRESHOLD = 1e-4
+
+
+def _louvain_local_moves(indptr, indices, data, k, m2, resolution, community, order):
+    """
+    Louvain local-moving phase over a symmetric CSR adjacency matrix.
+
+    Moves nodes (visited in `order`) to the neighbouring community with the
+    best modularity gain until no move improves, updating `community` in
+    place. Gains are computed from cached community degree sums, so each
+    visit costs O(deg(i)). Returns True if any node moved.
+    """
+    n = k.shape[0]
+    sigma_tot = np.zeros(n)
+    for i in range(n):
+        sigma_tot[community[i]] += k[i]
+
+    # Scratch space for the weight from the current node to each community
+    neighbour_weight = np.zeros(n)
+    neighbour_comms = np.empty(n, dtype=np.int64)
+    last_seen = np.full(n, -1, dtype=np.int64)
+
+    moved = False
+    improved = True
+    while improved:
+        improved = False
+        for i in order:
+            count = 0
+            for p in range(indptr[i], indptr[i + 1]):
+                j = indices[p]
+                if j == i:
+                    continue
+                c = community[j]
+                if last_seen[c] != i:
+                    last_seen[c] = i
+                    neighbour_weight[c] = 0.0
+                    neighbour_comms[count] = c
+                    count += 1
+                neighbour_weight[c] += data[p]
+
+            current = community[i]
+            sigma_tot[current] -= k[i]
+            best = current
+            best_gain = 0.0
+            if last_seen[current] == i:
+                best_gain = neighbour_weight[current]
+            best_gain -= resolution * sigma_tot[current] * k[i] / m2
+            for q in range(count):
+                c = neighbour_comms[q]
+                gain = neighbour_weight[c] - resolution * sigma_tot[c] * k[i] / m2
+                if gain > best_gain:
+                    best_gain = gain
+                    best = c
+            sigma_tot[best] += k[i]
+            if best != current:
+                community[i] = best
+                improved = True
+                moved = True
+    return moved
+
+
+if njit is not None:
+    _louvain_local_moves = njit(cache=True)(_louvain_local_moves)
+
+
+# Sweep cap for the parallel local-moving phase
+LOUVAIN_PARALLEL_SWEEPS = 32
+
+
+def _greedy_coloring(indptr, indices):
+    """
+    Greedy distance-1 colouring of a symmetric CSR graph: no two adjacent
+    nodes share a colour. Returns each node's colour.
+    """
+    n = indptr.shape[0] - 1
+    color = np.full(n, -1, dtype=np.int64)
+    # forbidden[c] == i marks colour c as taken by a neighbour of node i
+    forbidden = np.full(n + 1, -1, dtype=np.int64)
+    for i in range(n):
+        for p in range(indptr[i], indptr[i + 1]):
+            c = color[indices[p]]
+            if c >= 0:
+                forbidden[c] = i
+        c = 0
+        while forbidden[c] == i:
+            c += 1
+        color[i] = c
+    return color
+
+
+def _louvain_parallel_moves(indptr, indices, data, k, m2, resolution, community, max_sweeps):
+    """
+    Parallel variant of _louvain_local_moves.
+
+    Nodes are coloured so that no two neighbours share a colour, then each
+    sweep visits one colour class at a time and picks the best community
+    for all of its nodes in parallel (prange). Nodes in a class are never
+    adjacent, so their link weights to each community are exact; only the
+    community degree sums are a class behind. Returns True if any node
+    moved.
+    """
+    n = k.shape[0]
+    color = _greedy_coloring(indptr, indices)
+    by_color = np.argsort(color, kind='mergesort')
+    bounds = np.searchsorted(color[by_color], np.arange(color.max() + 2))
+
+    sigma_tot = np.zeros(n)
+    for i in range(n):
+        sigma_tot[community[i]] += k[i]
+
+    moved = False
+    for _ in range(max_sweeps):
+        moves = 0
+        for c in range(bounds.shape[0] - 1):
+            members = by_color[bounds[c]:bounds[c + 1]]
+            target = np.empty(members.shape[0], dtype=np.int64)
+            for t in prange(members.shape[0]):
+                i = members[t]
+                start = indptr[i]
+                end = indptr[i + 1]
+                # Neighbouring communities and link weights, grouped by sorting
+                comms = np.empty(end - start, dtype=np.int64)
+                weights = np.empty(end - start)
+                count = 0
+                for p in range(start, end):
+                    j = indices[p]
+                    if j != i:
+                        comms[count] = community[j]
+                        weights[count] = data[p]
+                        count += 1
+                by_comm = np.argsort(comms[:count])
+
+                current = community[i]
+                own = 0.0
+                for q in range(count):
+                    if comms[q] == current:
+                        own += weights[q]
+                best = current
+                best_gain = own - resolution * (sigma_tot[current] - k[i]) * k[i] / m2
+
+                q = 0
+                while q < count:
+                    candidate = comms[by_comm[q]]
+                    w = 0.0
+                    while q < count and comms[by_comm[q]] == candidate:
+                        w += weights[by_comm[q]]
+                        q += 1
+                    if candidate == current:
+                        continue
+                    gain = w - resolution * sigma_tot[candidate] * k[i] / m2
+                    if gain > best_gain:
+                        best_gain = gain
+                        best = candidate
+                target[t] = best
+
+            for t in range(members.shape[0]):
+                i = members[t]
+                if target[t] != community[i]:
+                    sigma_tot[community[i]] -= k[i]
+                    sigma_tot[target[t]] += k[i]
+                    community[i] = target[t]
+                    moves += 1
+        if moves == 0:
+            break
+        moved = True
+    return moved
+
+
+if njit is not None:
+    _greedy_coloring = njit(cache=True)(_greedy_coloring)
+    _louvain_parallel_moves = njit(parallel=True, cache=True)(_louvain_parallel_moves)
+
+
+def _csr_modularity(adjacency, m2: float, resolution: float) -> float:
+    """Modularity of the partition that puts each node of `adjacency` alone."""
+    degrees = np.asarray(adjacency.sum(axis=1)).ravel()
+    return adjacency.diagonal().sum() / m2 - resolution * ((degrees / m2) ** 2).sum()
+
+
+def _louvain_fast(
+    adjacency,
+    resolution: float = 1.0,
+    max_level: int = LOUVAIN_MAX_LEVEL,
+    threshold: float = LOUVAIN_THRESHOLD,
+    seed=None,
+    parallel: bool = False,
+) -> np.ndarray:
+    """
+    Louvain on a symmetric CSR adjacency matrix whose diagonal counts
+    self-loops twice (so row sums are weighted degrees).
+
+    Each level runs the compiled local-moving phase (the parallel variant
+    when `parallel` is set), then collapses every community into one node
+    with P^T A P. Returns the community index of every row of `adjacency`.
+    """
+    rng = np.random.default_rng(seed)
+    m2 = adjacency.sum()
+    membership = np.arange(adjacency.shape[0])
+    modularity = _csr_modularity(adjacency, m2, resolution)
+
+    for _ in range(max_level):
+        n = adjacency.shape[0]
+        degrees = np.asarray(adjacency.sum(axis=1)).ravel()
+        community = np.arange(n)
+        if parallel:
+            moved = _louvain_parallel_moves(
+                adjacency.indptr, adjacency.indices, adjacency.data,
+                degrees, m2, resolution, community, LOUVAIN_PARALLEL_SWEEPS,
+            )
+        else:
+            moved = _louvain_local_moves(
+                adjacency.indptr, adjacency.indices, adjacency.data,
+                degrees, m2, resolution, community, rng.permutation(n),
+            )
+        if not moved:
+            break
+
+        _, community = np.unique(community, return_inverse=True)
+        assignment = sp.csr_array(
+            (np.ones(n), (np.arange(n), community)), shape=(n, community.max() + 1)
+        )
+        aggregated = (assignment.T @ adjacency @ assignment).tocsr()
+        new_modularity = _csr_modularity(aggregated, m2, resolution)
+        # Simultaneous moves can overshoot; never keep a worse level
+        if new_modularity < modularity:
+            break
+
+        membership = community[membership]
+        adjacency = aggregated
+        if new_modularity - modularity <= threshold:
+            break
+        modularity = new_modularity
+
+    return membership
+
+
+def _undirected_size(adjacency) -> float:
+    """Total edge weight of a symmetric adjacency matrix, counting each edge once."""
+    return (adjacency.sum() + adjacency.diagonal().sum()) / 2
+
+
+def _detect_communities(
+    adjacency,
+    nodelist: List[str],
+    resolution: float = 1.0,
+    max_level: int = LOUVAIN_MAX_LEVEL,
+    threshold: float = LOUVAIN_THRESHOLD,
+    seed: Optional[int] = None,
+    parallel: bool = False,
+) -> List[set]:
+    """
+    Modularity-based community detection on an undirected graph, given as
+    a symmetric weighted CSR matrix (self-loops stored once on the
+    diagonal, as in an nx.Graph) and the node of each row. `parallel`
+    spreads the compiled Louvain's sweeps over all cores; leave it off in
+    worker processes that already occupy one core each.
+
+    Uses graspologic's Leiden if installed, then the Numba-compiled CSR
+    Louvain, then python-louvain (at the default resolution only), and
+    otherwise falls back to networkx's pure-Python Louvain. Only the
+    compiled Louvain runs on the CSR itself; the others are handed an
+    integer-labelled nx.Graph built from it.
+    """
+    if adjacency.nnz == 0:
+        return [{node} for node in nodelist]
+
+    if graspologic_leiden is not None:
+        partition = graspologic_leiden(
+            nx.from_scipy_sparse_array(adjacency), resolution=resolution, random_seed=seed
+        )
+    elif njit is not None:
+        membership = _louvain_fast(
+            (adjacency + sp.diags_array(adjacency.diagonal())).tocsr(),
+            resolution=resolution,
+            max_level=max_level,
+            threshold=threshold,
+            seed=seed,
+            parallel=parallel,
+        )
+        partition = dict(enumerate(membership.tolist()))
+    elif community_louvain is not None and resolution == 1.0:
+        # python-louvain scales the internal-weight term of its level-stop
+        # modularity by `resolution` but the null-model term of its move
+        # gain, so it only optimizes standard modularity at 1.0; scaled
+        # per-component runs go to networkx instead
+        partition = community_louvain.best_partition(
+            nx.from_scipy_sparse_array(adjacency), resolution=resolution, random_state=seed
+        )
+    else:
+        louvain = nx.community.louvain_communities(
+            nx.from_scipy_sparse_array(adjacency),
+            resolution=resolution,
+            threshold=threshold,
+            max_level=max_level,
+            seed=seed,
+        )
+        partition = {
+            index: community_id
+            for community_id, members in enumerate(louvain)
+            for index in members
+        }
+
+    communities = {}
+    for index, community_id in partition.items():
+        communities.setdefault(community_id, set()).add(nodelist[index])
+    return list(communities.values())
+
+
+def _louvain_components(
+    components: List[Tuple[sp.csr_array, List[str]]], total_weight: float, options: Dict
+) -> List[set]:
+    """
+    Run Louvain on each connected component, given as its adjacency
+    matrix and node list. `options` are passed through to
+    _detect_communities.
+
+    Scaling the resolution by the component's share of the total edge
+    weight makes each per-component run optimize the same modularity gain
+    as a run over the whole graph would.
+    """
+    communities = []
+    for adjacency, nodelist in components:
+        resolution = _undirected_size(adjacency) / total_weight
+        communities.extend(
+            _detect_communities(adjacency, nodelist, resolution=resolution, **options)
+        )
+    return communities
+
+
+def _parallel_louvain(adjacency, nodelist: List[str], **options) -> List[set]:
+    """
+    Louvain community detection spread over worker processes.
+
+    Communities never span connected components, so components are
+    partitioned into per-worker batches (balanced by edge count) and solved
+    independently. Transaction graphs over a short window are highly
+    fragmented, which keeps all cores busy. Takes the same symmetric CSR
+    as _detect_communities; extra keyword `options` (max_level,
+    threshold, seed) are passed through to it.
+    """
+    workers = os.cpu_count() or 1
+    total_weight = _undirected_size(adjacency)
+    if workers == 1 or total_weight == 0:
+        return _detect_communities(adjacency, nodelist, **options)
+    # A single-process run has every core to itself; pool workers do not
+    single_process = dict(options, parallel=True)
+
+    count, labels = connected_components(adjacency, directed=False)
+    # Permute rows and columns so every component is a contiguous block
+    order = np.argsort(labels, kind='stable')
+    permuted = adjacency[order][:, order].tocsr()
+    bounds = np.searchsorted(labels[order], np.arange(count + 1))
+    components = sorted(
+        (
+            (permuted[start:end, start:end], [nodelist[i] for i in order[start:end]])
+            for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist())
+        ),
+        key=lambda component: component[0].nnz,
+        reverse=True,
+    )
+    # Not worth the process overhead when one component dominates
+    if components[0][0].nnz * 2 > adjacency.nnz:
+        return _detect_communities(adjacency, nodelist, **single_process)
+
+    batches = [[] for _ in range(workers)]
+    batch_sizes = [0] * workers
+    for component in components:
+        i = batch_sizes.index(min(batch_sizes))
+        batches[i].append(component)
+        batch_sizes[i] += component[0].nnz
+    batches = [b for b in batches if b]
+
+    # forkserver: forking the threaded API process directly is unsafe
+    context = multiprocessing.get_context("forkserver")
+    with ProcessPoolExecutor(max_workers=len(batches), mp_context=context) as executor:
+        results = executor.map(
+            _louvain_components, batches, [total_weight] * len(batches), [options] * len(batches)
+        )
+        return [community for batch in results for community in batch]
+
+
 class TransactionGraph:
     """
     Builds and analyzes Bitcoin transaction networks.
@@ -74,7 +645,15 @@ class TransactionGraph:
         self.graph = nx.DiGraph()
         self.address_metadata = {}
         self.transaction_timing = {}
-        self._pagerank_cache = None
+        # Every mutation bumps the version; derived results (PageRank,
+        # communities, matrices) are cached with the version they were
+        # computed at and ignored once the graph has moved on
+        self._version = 0
+        self._derived = {}
+        # Addresses are interned to dense integer ids (in first-seen order)
+        # so matrix builds index arrays instead of hashing address strings
+        self._addr_to_id = {}
+        self._id_to_addr = []
         
     def add_transaction(
         self, 
@@ -94,17 +673,25 @@ class TransactionGraph:
         """
         if timestamp:
             self.transaction_timing[tx_hash] = timestamp
+
+        # No input/output pairs means no edges; don't intern addresses that
+        # would never become graph nodes
+        if not inputs or not outputs:
+            return
             
+        # Proportion of value flowing to each output, the same for every input
+        total_output = sum(v for _, v in outputs)
+        shares = [(addr, value / total_output, value) for addr, value in outputs]
+        for output_addr, _ in outputs:
+            self._intern(output_addr)
+
         # Create edges from inputs to outputs
         for input_addr, input_value in inputs:
-            for output_addr, output_value in outputs:
-                # Calculate proportion of value flowing
-                weight = output_value / sum(v for _, v in outputs)
-                
+            self._intern(input_addr)
+            for output_addr, weight, output_value in shares:
                 if self.graph.has_edge(input_addr, output_addr):
                     # Update existing edge
                     self.graph[input_addr][output_addr]['weight'] += weight
-                    self.graph[input_addr][output_addr]['tx_count'] += 1
                     self.graph[input_addr][output_addr]['total_value'] += output_value
                 else:
                     # Add new edge
@@ -112,43 +699,302 @@ class TransactionGraph:
                         input_addr, 
                         output_addr, 
                         weight=weight,
-                        tx_count=1,
-                        total_value=output_value,
-                        first_tx=tx_hash
+                        total_value=output_value
                     )
                     
+        self._version += 1
         logger.info(f"Added transaction {tx_hash[:8]} to graph")
     
-    def calculate_pagerank(self, alpha=0.85) -> Dict[str, float]:
+    def add_transactions_bulk(
+        self,
+        transactions: Iterable[Tuple[str, List[Tuple[str, int]], List[Tuple[str, int]], Optional[datetime]]]
+    ):
+        """
+        Add many transactions to the graph at once.
+
+        Produces the same edges as calling add_transaction per transaction,
+        but accumulates edge attributes in a plain dict and inserts new edges
+        with a single add_edges_from call.
+
+        Args:
+            transactions: Iterable of (tx_hash, inputs, outputs, timestamp)
+                tuples, with inputs/outputs as in add_transaction
+        """
+        edges = {}
+        tx_count = 0
+        for tx_hash, inputs, outputs, timestamp in transactions:
+            tx_count += 1
+            if timestamp:
+                self.transaction_timing[tx_hash] = timestamp
+            if not inputs or not outputs:
+                continue
+
+            total_output = sum(v for _, v in outputs)
+            shares = [(addr, value / total_output, value) for addr, value in outputs]
+            for output_addr, _ in outputs:
+                self._intern(output_addr)
+            for input_addr, _ in inputs:
+                self._intern(input_addr)
+                for output_addr, weight, output_value in shares:
+                    data = edges.get((input_addr, output_addr))
+                    if data is None:
+                        edges[(input_addr, output_addr)] = {
+                            'weight': weight,
+                            'total_value': output_value,
+                        }
+                    else:
+                        data['weight'] += weight
+                        data['total_value'] += output_value
+
+        # Merge into edges already in the graph, bulk-insert the rest
+        new_edges = []
+        for (input_addr, output_addr), data in edges.items():
+            if self.graph.has_edge(input_addr, output_addr):
+                existing = self.graph[input_addr][output_addr]
+                existing['weight'] += data['weight']
+                existing['total_value'] += data['total_value']
+            else:
+                new_edges.append((input_addr, output_addr, data))
+        self.graph.add_edges_from(new_edges)
+        self._version += 1
+
+        logger.info(f"Added {tx_count} transactions ({len(edges)} edges) to graph")
+
+    def _intern(self, address: str) -> int:
+        """Return the integer id of an address, assigning the next one if new."""
+        node_id = self._addr_to_id.get(address)
+        if node_id is None:
+            node_id = len(self._id_to_addr)
+            self._addr_to_id[address] = node_id
+            self._id_to_addr.append(address)
+        return node_id
+
+    def _get_cached(self, key):
+        """Return a derived result cached at the current graph version, or None."""
+        entry = self._derived.get(key)
+        if entry is not None and entry[0] == self._version:
+            return entry[1]
+        return None
+
+    def _set_cached(self, key, value):
+        """Cache a derived result against the current graph version."""
+        # Drop results from older versions rather than holding them forever
+        self._derived = {
+            k: entry for k, entry in self._derived.items() if entry[0] == self._version
+        }
+        self._derived[key] = (self._version, value)
+
+    def calculate_pagerank(self, alpha=0.85, max_iter=100, tol=1.0e-6) -> Dict[str, float]:
         """
         Calculate PageRank for all addresses in the graph.
         Higher score = more central/influential address.
-        Results are cached and reused until the graph is rebuilt.
+        Runs on the GPU when cuGraph or CuPy is installed, otherwise SciPy.
+        Results are cached per set of arguments until the graph is modified.
         """
         if len(self.graph) == 0:
             return {}
 
-        if self._pagerank_cache is not None:
-            return self._pagerank_cache
+        key = ('pagerank', alpha, max_iter, tol)
+        cached = self._get_cached(key)
+        if cached is not None:
+            return cached
+
+        csr = self.as_csr()
+        nodelist = self._id_to_addr
+        n = len(nodelist)
 
-        pagerank = nx.pagerank(self.graph, alpha=alpha, weight='weight')
-        self._pagerank_cache = pagerank
+        x = None
+        if cugraph is not None:
+            try:
+                x = _pagerank_cugraph(csr, alpha, max_iter, tol)
+            except Exception as e:
+                logger.warning(f"cuGraph PageRank failed, falling back: {e}")
+
+        if x is None:
+            # Row-normalize edge weights into transition probabilities; rows
+            # with no out-weight are dangling
+            out_weight = np.asarray(csr.sum(axis=1)).ravel()
+            is_dangling = out_weight == 0
+            inv_out = np.zeros(n)
+            inv_out[~is_dangling] = 1.0 / out_weight[~is_dangling]
+            transition = sp.diags(inv_out) @ csr
+            # float32 halves the bytes each SpMV streams; single precision
+            # is ample for the tolerances PageRank is run at
+            transition_t = transition.T.tocsr().astype(np.float32)
+
+            if cupy is not None:
+                try:
+                    x = _pagerank_power_iteration(
+                        cupy_sparse.csr_matrix(sp.csr_matrix(transition_t)),
+                        cupy.asarray(is_dangling),
+                        alpha, max_iter, tol, xp=cupy,
+                    ).get()
+                except nx.PowerIterationFailedConvergence:
+                    raise
+                except Exception as e:
+                    logger.warning(f"GPU PageRank failed, falling back to CPU: {e}")
+            if x is None:
+                x = _pagerank_power_iteration(transition_t, is_dangling, alpha, max_iter, tol)
+
+        pagerank = dict(zip(nodelist, x.tolist()))
+        self._set_cached(key, pagerank)
         logger.info(f"Calculated PageRank for {len(pagerank)} addresses")
         return pagerank
+
+    @property
+    def nodelist(self) -> List[str]:
+        """Addresses in interned-id order: row/column i of as_csr is nodelist[i]."""
+        return self._id_to_addr
+
+    def address_ids(self, addresses: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Interned ids of `addresses` and a mask of which are in the graph;
+        addresses not in the graph get id 0, so mask results with `known`.
+        """
+        ids = self._addr_to_id
+        count = len(addresses)
+        known = np.fromiter((a in ids for a in addresses), dtype=bool, count=count)
+        node_ids = np.fromiter((ids.get(a, 0) for a in addresses), dtype=np.int64, count=count)
+        return node_ids, known
+
+    def as_csr(self) -> sp.csr_array:
+        """
+        Weighted adjacency matrix of the graph in CSR form (row = sender).
+        Row/column i is the address with interned id i, i.e. the i-th
+        address added to the graph. Built lazily on first use and rebuilt
+        after the graph is modified.
+        """
+        csr = self._get_cached('csr')
+        if csr is None:
+            n = len(self._id_to_addr)
+            src, dst, weight, _ = self._edge_arrays()
+            csr = sp.coo_array((weight, (src, dst)), shape=(n, n)).tocsr()
+            self._set_cached('csr', csr)
+        return csr
+
+    def _edge_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Every edge as parallel (src id, dst id, weight, total_value) arrays,
+        from a single pass over the networkx edges. Cached like as_csr.
+        """
+        edges = self._get_cached('edges')
+        if edges is None:
+            m = self.graph.number_of_edges()
+            ids = self._addr_to_id
+            src = np.empty(m, dtype=np.int32)
+            dst = np.empty(m, dtype=np.int32)
+            weight = np.empty(m, dtype=np.float64)
+            value = np.empty(m, dtype=np.int64)
+            for i, (u, v, data) in enumerate(self.graph.edges(data=True)):
+                src[i] = ids[u]
+                dst[i] = ids[v]
+                weight[i] = data['weight']
+                value[i] = data['total_value']
+            edges = (src, dst, weight, value)
+            self._set_cached('edges', edges)
+        return edges
+
+    def address_totals(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Per-address (in_degree, out_degree, total_received, total_sent)
+        arrays indexed by interned address id, with the value totals in
+        int64 satoshis. Cached like as_csr.
+        """
+        totals = self._get_cached('totals')
+        if totals is None:
+            csr = self.as_csr()
+            n = csr.shape[0]
+            src, dst, _, value = self._edge_arrays()
+            received = np.zeros(n, dtype=np.int64)
+            sent = np.zeros(n, dtype=np.int64)
+            np.add.at(received, dst, value)
+            np.add.at(sent, src, value)
+            # Degrees straight from the CSR structure: row lengths are
+            # out-degrees, column occurrences are in-degrees
+            totals = (
+                np.bincount(csr.indices, minlength=n),
+                np.diff(csr.indptr),
+                received,
+                sent,
+            )
+            self._set_cached('totals', totals)
+        return totals
+
+    def undirected_adjacency(self):
+        """
+        Undirected forms of the graph, indexed by interned address id, as a
+        (neighbours, weights) pair of symmetric CSR matrices:
+
+        - neighbours: 1 wherever two distinct addresses share an edge in
+          either direction, the structure nx.clustering sees on
+          to_undirected(). Built from the CSR's structure, so links whose
+          weight is 0 (0-sat outputs) still count.
+        - weights: both directions of a pair summed, self-loops kept once,
+          as community detection expects.
+
+        Cached like as_csr.
+        """
+        undirected = self._get_cached('undirected')
+        if undirected is None:
+            csr = self.as_csr()
+            n = csr.shape[0]
+            structure = sp.csr_array(
+                (np.ones(csr.nnz), csr.indices, csr.indptr), shape=csr.shape
+            )
+            structure = (structure + structure.T).tocoo()
+            off_diagonal = structure.row != structure.col
+            neighbours = sp.csr_array(
+                (
+                    np.ones(np.count_nonzero(off_diagonal)),
+                    (structure.row[off_diagonal], structure.col[off_diagonal]),
+                ),
+                shape=(n, n),
+            )
+            weights = (csr + csr.T - sp.diags_array(csr.diagonal())).tocsr()
+            undirected = (neighbours, weights)
+            self._set_cached('undirected', undirected)
+        return undirected
     
-    def find_communities(self) -> List[set]:
+    def precompute_metrics(self):
+        """
+        Compute PageRank and per-address degrees and totals once the graph
+        is built, so request handlers only read cached results.
+        """
+        self.calculate_pagerank()
+        self.address_totals()
+
+    def find_communities(
+        self,
+        max_level: int = LOUVAIN_MAX_LEVEL,
+        threshold: float = LOUVAIN_THRESHOLD,
+        seed: Optional[int] = 42,
+    ) -> List[set]:
         """
         Identify clusters of addresses that transact together.
         Uses Louvain community detection algorithm.
+        Results are cached per set of arguments until the graph is modified.
+
+        Args:
+            max_level: Maximum number of Louvain aggregation levels
+            threshold: Minimum modularity gain for another level
+            seed: Random seed, so repeated rebuilds give stable communities
         """
         if len(self.graph) == 0:
             return []
+
+        key = ('communities', max_level, threshold, seed)
+        cached = self._get_cached(key)
+        if cached is not None:
+            return cached
             
-        # Convert to undirected for community detection
-        undirected = self.graph.to_undirected()
+        # Shared undirected weights, with self-loops kept once
+        _, undirected = self.undirected_adjacency()
         
-        # Use Louvain algorithm
-        communities = nx.community.louvain_communities(undirected, weight='weight')
+        # Use Louvain algorithm, one process per group of components
+        communities = _parallel_louvain(
+            undirected, self._id_to_addr, max_level=max_level, threshold=threshold, seed=seed
+        )
+        self._set_cached(key, communities)
         
         logger.info(f"Found {len(communities)} communities")
         return communities
@@ -161,18 +1007,39 @@ class TransactionGraph:
     ) -> Optional[List[str]]:
         """
         Find shortest path from source to target address.
-        Returns list of addresses in the path, or None if no path exists.
+        Returns list of addresses in the path, or None if no path exists
+        within max_hops.
         """
-        try:
-            path = nx.shortest_path(self.graph, source, target)
-            logger.info(f"Found path from {source[:8]} to {target[:8]}: {len(path)} hops")
-            return path
-        except nx.NetworkXNoPath:
-            logger.info(f"No path found from {source[:8]} to {target[:8]}")
+        if max_hops < 0:
             return None
-        except nx.NodeNotFound as e:
-            logger.warning(f"Address not found in graph: {e}")
+        for address in (source, target):
+            if address not in self._addr_to_id:
+                logger.warning(f"Address not found in graph: {address}")
+                return None
+        source_id = self._addr_to_id[source]
+        target_id = self._addr_to_id[target]
+
+        # Edges are unit-length for tracing; the search on the CSR stops
+        # expanding once paths grow longer than max_hops
+        dist, predecessors = dijkstra(
+            self.as_csr(),
+            indices=source_id,
+            unweighted=True,
+            limit=max_hops,
+            return_predecessors=True,
+        )
+        if np.isinf(dist[target_id]):
+            logger.info(
+                f"No path found from {source[:8]} to {target[:8]} within {max_hops} hops"
+            )
             return None
+
+        path = [target_id]
+        while path[-1] != source_id:
+            path.append(int(predecessors[path[-1]]))
+        path = [self._id_to_addr[node_id] for node_id in reversed(path)]
+        logger.info(f"Found path from {source[:8]} to {target[:8]}: {len(path)} hops")
+        return path
     
     def get_address_metrics(self, address: str) -> Dict:
         """
@@ -181,27 +1048,34 @@ class TransactionGraph:
         if address not in self.graph:
             return {"error": "Address not found in graph"}
         
+        node_id = self._addr_to_id[address]
+        in_degree, out_degree, total_received, total_sent = self.address_totals()
         metrics = {
             "address": address,
-            "in_degree": self.graph.in_degree(address),
-            "out_degree": self.graph.out_degree(address),
-            "total_received": sum(
-                data['total_value'] 
-                for _, _, data in self.graph.in_edges(address, data=True)
-            ),
-            "total_sent": sum(
-                data['total_value'] 
-                for _, _, data in self.graph.out_edges(address, data=True)
-            ),
+            "in_degree": int(in_degree[node_id]),
+            "out_degree": int(out_degree[node_id]),
+            "total_received": int(total_received[node_id]),
+            "total_sent": int(total_sent[node_id]),
         }
         
         # Calculate clustering coefficient (how connected neighbors are)
-        undirected = self.graph.to_undirected()
-        if address in undirected:
-            metrics["clustering_coefficient"] = nx.clustering(undirected, address)
+        metrics["clustering_coefficient"] = self._clustering(node_id)
         
         return metrics
 
+    def _clustering(self, node_id: int) -> float:
+        """
+        Unweighted local clustering coefficient of one address, as
+        nx.clustering computes it on the undirected graph: the fraction of
+        neighbour pairs that are themselves connected.
+        """
+        pattern, _ = self.undirected_adjacency()
+        neighbours = pattern.indices[pattern.indptr[node_id]:pattern.indptr[node_id + 1]]
+        degree = len(neighbours)
+        # Each link between two neighbours appears twice in the submatrix
+        closed = pattern[neighbours][:, neighbours].nnz if degree > 1 else 0
+        return closed / (degree * (degree - 1)) if closed else 0
+
 
 class RiskAnalyzer:
     """
@@ -211,41 +1085,65 @@ class RiskAnalyzer:
     def __init__(self, graph: TransactionGraph):
         self.graph = graph
         self.known_risks = {}  # Could load from database
+        self._double_spend_cache = {}
 
-    def _check_double_spend_involvement(self, address: str) -> dict:
+    def _check_double_spend_batch(self, addresses: List[str]) -> Dict[str, dict]:
         """
-        Check if address is involved in any double-spend attempts.
-        Returns dict with count and details.
+        Check many addresses for double-spend involvement in one query.
+        Returns a dict with count and details for every address.
         """
-        try:
-            conn = get_db_connection()
+        results = {address: {"count": 0, "tx_hashes": []} for address in addresses}
+        if not addresses:
+            return results
+
+        with db_connection() as conn:
             cur = conn.cursor()
-            # Find transactions involving this address that have double_spend_flag
+            # Find transactions involving these addresses that have double_spend_flag
             cur.execute("""
-                SELECT DISTINCT encode(obs.tx_hash, 'hex') as tx_hash
+                SELECT tout.address, encode(obs.tx_hash, 'hex') as tx_hash
                 FROM transaction_observations obs
                 JOIN transaction_outputs tout ON obs.tx_hash = tout.tx_hash
                 WHERE obs.double_spend_flag = TRUE
-                  AND tout.address = %s
+                  AND tout.address = ANY(%s)
                 UNION
-                SELECT DISTINCT encode(obs.tx_hash, 'hex') as tx_hash
+                SELECT prev_out.address, encode(obs.tx_hash, 'hex') as tx_hash
                 FROM transaction_observations obs
                 JOIN transaction_inputs tin ON obs.tx_hash = tin.tx_hash
                 JOIN transaction_outputs prev_out
                     ON tin.prev_tx_hash = prev_out.tx_hash
                     AND tin.prev_output_idx = prev_out.output_index
                 WHERE obs.double_spend_flag = TRUE
-                  AND prev_out.address = %s
-            """, (address, address))
+                  AND prev_out.address = ANY(%s)
+            """, (addresses, addresses))
 
-            rows = cur.fetchall()
+            for row in cur:
+                results[row["address"]]["tx_hashes"].append(row["tx_hash"])
             cur.close()
-            conn.close()
 
-            return {
-                "count": len(rows),
-                "tx_hashes": [row["tx_hash"] for row in rows]
-            }
+        for info in results.values():
+            info["count"] = len(info["tx_hashes"])
+        return results
+
+    def prefetch_double_spend(self, addresses: Iterable[str]):
+        """
+        Look up double-spend involvement for a batch of addresses ahead of
+        scoring them, so calculate_risk_score does not query per address.
+        """
+        try:
+            self._double_spend_cache.update(self._check_double_spend_batch(list(addresses)))
+        except Exception as e:
+            logger.warning(f"Error prefetching double-spend involvement: {e}")
+
+    def _check_double_spend_involvement(self, address: str) -> dict:
+        """
+        Check if address is involved in any double-spend attempts.
+        Returns dict with count and details.
+        """
+        cached = self._double_spend_cache.get(address)
+        if cached is not None:
+            return cached
+        try:
+            return self._check_double_spend_batch([address])[address]
         except Exception as e:
             logger.warning(f"Error checking double-spend for {address}: {e}")
             return {"count": 0, "tx_hashes": []}
@@ -317,6 +1215,89 @@ class RiskAnalyzer:
             explanation=explanation
         )
     
+    def _risk_factor_arrays(
+        self, addresses: List[str], pagerank: Optional[Dict[str, float]] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Compute every risk factor for many addresses at once, as arrays
+        aligned with `addresses` (0 where the factor does not apply).
+        Same rules and weights as calculate_risk_score.
+        """
+        count = len(addresses)
+        ids, known = self.graph.address_ids(addresses)
+        factor_names = ("double_spend", "potential_mixer", "high_centrality", "high_volume", "low_clustering")
+        if not known.any():
+            return {name: np.zeros(count) for name in factor_names}
+
+        self.prefetch_double_spend(a for a in addresses if a not in self._double_spend_cache)
+        double_spend = np.fromiter(
+            (self._double_spend_cache.get(a, {"count": 0})["count"] > 0 for a in addresses),
+            dtype=bool,
+            count=count,
+        )
+
+        in_degree, out_degree, _, _ = self.graph.address_totals()
+        in_degree = in_degree[ids]
+        out_degree = out_degree[ids]
+        total_tx = in_degree + out_degree
+
+        if pagerank is None:
+            pagerank = self.graph.calculate_pagerank()
+        pr_score = np.fromiter((pagerank.get(a, 0) for a in addresses), dtype=np.float64, count=count)
+
+        # Local clustering coefficient: closed neighbour pairs (each triangle
+        # counted twice by rows @ A restricted to A's pattern) over d(d-1)
+        pattern, _ = self.graph.undirected_adjacency()
+        rows = pattern[ids]
+        closed = np.asarray((rows @ pattern).multiply(rows).sum(axis=1)).ravel()
+        neighbours = np.diff(pattern.indptr)[ids]
+        possible = neighbours * (neighbours - 1)
+        clustering = np.divide(closed, possible, out=np.zeros(count), where=possible > 0)
+
+        factors = dict(zip(factor_names, (
+            np.where(double_spend, 45.0, 0.0),
+            np.where((in_degree > 50) & (out_degree > 50), 25.0, 0.0),
+            np.where(pr_score > 0.01, np.minimum(pr_score * 1500, 15), 0.0),
+            np.where(total_tx > 100, np.minimum(total_tx / 100, 10), 0.0),
+            np.where(clustering < 0.1, 5.0, 0.0),
+        )))
+        for values in factors.values():
+            values[~known] = 0.0
+        return factors
+
+    def calculate_risk_scores(
+        self, addresses: List[str], pagerank: Optional[Dict[str, float]] = None
+    ) -> List[RiskScore]:
+        """
+        Vectorized calculate_risk_score over many addresses: one batched
+        double-spend query and array operations over the graph's CSR.
+        """
+        factors = self._risk_factor_arrays(addresses, pagerank)
+        scores = sum(factors.values())
+        names = list(factors)
+        columns = [factors[name].tolist() for name in names]
+
+        results = []
+        for i, address in enumerate(addresses):
+            if address not in self.graph.graph:
+                results.append(RiskScore(
+                    address=address,
+                    score=0.0,
+                    risk_factors={},
+                    explanation="Address not found in transaction graph"
+                ))
+                continue
+            risk_factors = {
+                name: column[i] for name, column in zip(names, columns) if column[i]
+            }
+            results.append(RiskScore(
+                address=address,
+                score=float(scores[i]),
+                risk_factors=risk_factors,
+                explanation=self._generate_explanation(risk_factors)
+            ))
+        return results
+
     def _generate_explanation(self, risk_factors: Dict[str, float]) -> str:
         """Generate human-readable explanation of risk factors"""
         if not risk_factors:
@@ -340,65 +1321,24 @@ class RiskAnalyzer:
 def main():
     """Load real transactions from the database and run analytics."""
     logger.info("Connecting to database...")
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    logger.info("Querying transactions...")
-    cur.execute("""
-        SELECT
-            t.tx_hash,
-            to_in.address   AS input_address,
-            to_in.value_satoshis AS input_value,
-            to_out.address  AS output_address,
-            to_out.value_satoshis AS output_value,
-            obs.first_seen_at
-        FROM transactions t
-        JOIN transaction_inputs ti ON t.tx_hash = ti.tx_hash
-        JOIN transaction_outputs to_in
-            ON ti.prev_tx_hash = to_in.tx_hash
-           AND ti.prev_output_idx = to_in.output_index
-        JOIN transaction_outputs to_out ON t.tx_hash = to_out.tx_hash
-        LEFT JOIN transaction_observations obs ON t.tx_hash = obs.tx_hash
-        WHERE to_in.address IS NOT NULL
-          AND to_out.address IS NOT NULL
-        ORDER BY obs.first_seen_at DESC
-        LIMIT 50000
-    """)
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-
-    # Group rows by transaction
-    tx_data = {}
-    for row in rows:
-        tx_hash = bytes(row["tx_hash"]).hex()
-        if tx_hash not in tx_data:
-            tx_data[tx_hash] = {
-                "inputs": set(),
-                "outputs": set(),
-                "timestamp": row["first_seen_at"],
-            }
-        if row["input_address"]:
-            tx_data[tx_hash]["inputs"].add(
-                (row["input_address"], int(row["input_value"]))
-            )
-        if row["output_address"]:
-            tx_data[tx_hash]["outputs"].add(
-                (row["output_address"], int(row["output_value"]))
-            )
+    graph = TransactionGraph()
+    with db_connection() as conn:
+        # Named (server-side) cursor: rows arrive in itersize batches and
+        # are added to the graph as they stream in, instead of the whole
+        # result being materialized with fetchall()
+        cur = conn.cursor(name='tx_stream')
+        cur.itersize = 2000
 
-    logger.info(f"Loaded {len(tx_data)} transactions from database")
+        logger.info("Querying transactions...")
+        cur.execute(TX_EDGES_QUERY)
 
-    # Build graph
-    graph = TransactionGraph()
-    for tx_hash, data in tx_data.items():
-        if data["inputs"] and data["outputs"]:
-            graph.add_transaction(
-                tx_hash,
-                list(data["inputs"]),
-                list(data["outputs"]),
-                data["timestamp"],
-            )
+        # Build graph in a single batch
+        graph.add_transactions_bulk(
+            (row["tx_hash"].hex(), row["inputs"], row["outputs"], row["first_seen_at"])
+            for row in cur
+            if row["inputs"] and row["outputs"]
+        )
+        cur.close()
 
     logger.info(
         f"Graph has {graph.graph.number_of_nodes()} nodes "
@@ -407,7 +1347,7 @@ def main():
 
     # PageRank
     pagerank = graph.calculate_pagerank()
-    top = sorted(pagerank.items(), key=lambda x: x[1], reverse=True)[:10]
+    top = heapq.nlargest(10, pagerank.items(), key=lambda x: x[1])
     logger.info("Top 10 addresses by PageRank:")
     for addr, score in top:
         logger.info(f"  {addr}  {score:.6f}")
@@ -0,0 +1,150 @@
+"""
+Equivalence checks for the graph analytics fast paths against networkx and
+the scalar reference code. No database needed.
+
+Usage:
+    python test_graph_analytics.py    (or: pytest test_graph_analytics.py)
+"""
+
+import random
+
+import networkx as nx
+
+import graph_analytics
+from graph_analytics import RiskAnalyzer, TransactionGraph
+
+
+def build_graph(seed=7, tx_count=3000):
+    """Random transactions with a few hub addresses, so the risk rules have something to flag."""
+    rng = random.Random(seed)
+
+    def address():
+        # 30% of traffic touches one of 40 hubs
+        if rng.random() < 0.3:
+            return f"hub{rng.randrange(40)}"
+        return f"addr{rng.randrange(1500)}"
+
+    graph = TransactionGraph()
+    transactions = []
+    for i in range(tx_count):
+        inputs = [(address(), 1) for _ in range(rng.randint(1, 3))]
+        outputs = [(address(), rng.randint(1, 10**8)) for _ in range(rng.randint(1, 3))]
+        transactions.append((f"{i:064x}", inputs, outputs, None))
+    graph.add_transactions_bulk(transactions[:2000])
+    for tx in transactions[2000:]:
+        graph.add_transaction(*tx)
+    return graph
+
+
+def offline_analyzer(graph):
+    """RiskAnalyzer with double-spend lookups answered from its cache."""
+    analyzer = RiskAnalyzer(graph)
+    for address in list(graph.graph) + ["not-in-graph"]:
+        analyzer._double_spend_cache[address] = {
+            "count": int(address.endswith("7")),
+            "tx_hashes": [],
+        }
+    return analyzer
+
+
+def test_risk_scores_match_scalar_path():
+    graph = build_graph()
+    analyzer = offline_analyzer(graph)
+    pagerank = graph.calculate_pagerank()
+    addresses = list(graph.graph) + ["not-in-graph"]
+
+    batch = analyzer.calculate_risk_scores(addresses, pagerank)
+    assert [risk.address for risk in batch] == addresses
+    assert any(risk.risk_factors for risk in batch)
+    for risk in batch:
+        scalar = analyzer.calculate_risk_score(risk.address, pagerank)
+        assert abs(scalar.score - risk.score) < 1e-9, risk.address
+        assert scalar.risk_factors.keys() == risk.risk_factors.keys(), risk.address
+
+
+def test_address_metrics_match_networkx():
+    graph = build_graph()
+    clustering = nx.clustering(graph.graph.to_undirected())
+    for address in graph.graph:
+        metrics = graph.get_address_metrics(address)
+        assert metrics["in_degree"] == graph.graph.in_degree(address)
+        assert metrics["out_degree"] == graph.graph.out_degree(address)
+        assert metrics["total_received"] == sum(
+            value for _, _, value in graph.graph.in_edges(address, data="total_value")
+        )
+        assert metrics["total_sent"] == sum(
+            value for _, _, value in graph.graph.out_edges(address, data="total_value")
+        )
+        assert abs(metrics["clustering_coefficient"] - clustering[address]) < 1e-12
+    assert "error" in graph.get_address_metrics("not-in-graph")
+
+
+def test_zero_value_outputs_keep_their_links():
+    # A 0-sat output still links its addresses, with zero weight
+    graph = TransactionGraph()
+    graph.add_transaction("aa" * 32, [("A", 5)], [("B", 5), ("C", 0)])
+    graph.add_transaction("bb" * 32, [("B", 5)], [("C", 3), ("D", 2)])
+    clustering = nx.clustering(graph.graph.to_undirected())
+    analyzer = offline_analyzer(graph)
+    batch = analyzer.calculate_risk_scores(list(graph.graph))
+    for address, risk in zip(graph.graph, batch):
+        metrics = graph.get_address_metrics(address)
+        assert abs(metrics["clustering_coefficient"] - clustering[address]) < 1e-12
+        low = "low_clustering" in risk.risk_factors
+        assert low == (clustering[address] < 0.1), address
+
+
+def test_trace_funds_respects_max_hops():
+    graph = build_graph()
+    rng = random.Random(1)
+    nodes = list(graph.graph)
+    found = 0
+    for _ in range(300):
+        source, target = rng.choice(nodes), rng.choice(nodes)
+        try:
+            distance = nx.shortest_path_length(graph.graph, source, target)
+        except nx.NetworkXNoPath:
+            distance = None
+        for max_hops in (1, 3, 10):
+            path = graph.trace_funds(source, target, max_hops)
+            if distance is None or distance > max_hops:
+                assert path is None
+                continue
+            found += 1
+            assert path[0] == source and path[-1] == target
+            assert len(path) - 1 == distance
+            assert all(graph.graph.has_edge(u, v) for u, v in zip(path, path[1:]))
+    assert found
+    assert graph.trace_funds(nodes[0], nodes[0]) == [nodes[0]]
+    assert graph.trace_funds(nodes[0], nodes[0], max_hops=-1) is None
+    assert graph.trace_funds("not-in-graph", nodes[0]) is None
+
+
+def test_parallel_louvain_modularity():
+    # Many small dense components, like a short-window transaction graph
+    reference = nx.disjoint_union_all(
+        nx.connected_caveman_graph(size, 5) for size in range(2, 40)
+    )
+    adjacency = nx.to_scipy_sparse_array(reference, dtype=float, format="csr")
+    nodelist = list(reference)
+    expected = nx.community.modularity(
+        reference, nx.community.louvain_communities(reference, seed=42)
+    )
+
+    # Force the process-pool path even on a single-core machine
+    cpu_count = graph_analytics.os.cpu_count
+    graph_analytics.os.cpu_count = lambda: 2
+    try:
+        communities = graph_analytics._parallel_louvain(adjacency, nodelist, seed=42)
+    finally:
+        graph_analytics.os.cpu_count = cpu_count
+
+    assert sorted(n for c in communities for n in c) == sorted(nodelist)
+    assert nx.community.modularity(reference, communities) >= expected - 0.01
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"{name}: ok")